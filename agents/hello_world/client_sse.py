@@ -1,34 +1,165 @@
 #!/usr/bin/env python3
 import asyncio
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urljoin, urlparse
+
+import anyio
+import httpx
+import mcp.types as types
+from mcp.shared.message import SessionMessage
 from mcp.types import TextContent
 
+from pipeline import pipelined_hello
+
+# Keep connections alive between calls so the JSON-RPC POSTs reuse one
+# connection (the SSE GET holds its own for the whole session)
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=30.0)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _http_client_factory(timeout: httpx.Timeout | None = None) -> httpx.AsyncClient:
+    # Same defaults as mcp's create_mcp_http_client, plus the pool limits above
+    return httpx.AsyncClient(
+        timeout=timeout or httpx.Timeout(30.0),
+        follow_redirects=True,
+        limits=_HTTP_LIMITS,
+    )
+
+
+def parse_sse_frame(frame: bytes) -> tuple[bytes, bytes | None]:
+    """
+    Split one SSE frame (without its blank-line terminator) into (event, data).
+    `data` is None for frames that carry no data line, e.g. keepalive comments.
+    """
+    event = b"message"
+    data = []
+    for line in frame.split(b"\n"):
+        if line.startswith(b"data:"):
+            value = line[5:]
+            data.append(value[1:] if value[:1] == b" " else value)
+        elif line.startswith(b"event:"):
+            value = line[6:]
+            event = value[1:] if value[:1] == b" " else value
+        # comments (": ping") and unknown fields are ignored
+    return event, b"\n".join(data) if data else None
+
+
+async def iter_sse_events(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[bytes, bytes]]:
+    """
+    Yield (event, data) pairs from a raw SSE byte stream by scanning for the
+    blank line between frames.
+    """
+    buf = bytearray()
+    skip_lf = False
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        # A CR that ended the previous chunk may be the first half of a CRLF
+        if skip_lf and chunk[:1] == b"\n":
+            chunk = chunk[1:]
+        skip_lf = chunk[-1:] == b"\r"
+        if b"\r" in chunk:
+            # CRLF and lone CR line endings are legal SSE; normalize to LF
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        buf += chunk
+        while (idx := buf.find(b"\n\n")) != -1:
+            frame = bytes(buf[:idx])
+            del buf[:idx + 2]
+            event, data = parse_sse_frame(frame)
+            if data is not None:
+                yield event, data
+
+
+@asynccontextmanager
+async def sse_client(url: str, timeout: float = 5, sse_read_timeout: float = 60 * 5):
+    """
+    Minimal replacement for mcp.client.sse.sse_client that parses the event
+    stream with a plain bytes splitter instead of httpx-sse's line decoder.
+    Yields the same (read_stream, write_stream) pair.
+    """
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    async with anyio.create_task_group() as tg:
+        try:
+            async with _http_client_factory(timeout=httpx.Timeout(timeout, read=sse_read_timeout)) as client:
+                async with client.stream(
+                    "GET", url, headers={"Accept": "text/event-stream", "Cache-Control": "no-store"}
+                ) as response:
+                    response.raise_for_status()
+
+                    async def sse_reader(task_status=anyio.TASK_STATUS_IGNORED):
+                        try:
+                            async for event, data in iter_sse_events(response.aiter_bytes()):
+                                if event == b"endpoint":
+                                    endpoint_url = urljoin(url, data.decode())
+                                    # Only ever POST back to the origin we connected to
+                                    if urlparse(endpoint_url)[:2] != urlparse(url)[:2]:
+                                        raise ValueError(
+                                            f"Endpoint origin does not match connection origin: {endpoint_url}"
+                                        )
+                                    task_status.started(endpoint_url)
+                                elif event == b"message":
+                                    try:
+                                        message = types.JSONRPCMessage.model_validate_json(data)
+                                    except Exception as exc:
+                                        await read_stream_writer.send(exc)
+                                        continue
+                                    await read_stream_writer.send(SessionMessage(message))
+                        except Exception as exc:
+                            await read_stream_writer.send(exc)
+                        finally:
+                            await read_stream_writer.aclose()
+
+                    async def post_writer(endpoint_url: str):
+                        try:
+                            async with write_stream_reader:
+                                async for session_message in write_stream_reader:
+                                    message = session_message.message
+                                    # Encode with pydantic-core rather than httpx's json.dumps
+                                    response = await client.post(
+                                        endpoint_url,
+                                        content=message.__pydantic_serializer__.to_json(
+                                            message, by_alias=True, exclude_none=True
+                                        ),
+                                        headers=_JSON_HEADERS,
+                                    )
+                                    response.raise_for_status()
+                        finally:
+                            await write_stream.aclose()
+
+                    endpoint_url = await tg.start(sse_reader)
+                    tg.start_soon(post_writer, endpoint_url)
+
+                    try:
+                        yield read_stream, write_stream
+                    finally:
+                        tg.cancel_scope.cancel()
+        finally:
+            await read_stream_writer.aclose()
+            await write_stream.aclose()
+
+
 async def main():
     # URL matching the SSE endpoint on the server
     url = "http://127.0.0.1:8000/messages/"
 
     # Connect using the SSE transport
     async with sse_client(url) as (read_stream, write_stream):
-        # Open an MCP client session over the transport streams
-        async with ClientSession(read_stream, write_stream) as session:
-            # Perform the initialization handshake
-            init_result = await session.initialize()
-            print(f"Initialized session: {init_result}")
-
-            # List available tools on the server
-            tools = await session.list_tools()
-            print("Available tools:", [tool.name for tool in tools.tools])
-
-            # Invoke the 'hello' tool (no arguments needed)
-            call_result = await session.call_tool(name="hello", arguments={})
-
-            # Iterate over content blocks in the result
-            for content in call_result.content:
-                if isinstance(content, TextContent):
-                    print("Server says:", content.text)
-                else:
-                    print("Server returned content block of type:", type(content))
+        # Initialize, list tools and invoke 'hello' (no arguments needed)
+        # in one pipelined round-trip
+        init_result, tools, call_result = await pipelined_hello(read_stream, write_stream)
+        print(f"Initialized session: {init_result}")
+        print("Available tools:", [tool.name for tool in tools.tools])
+
+        # Iterate over content blocks in the result
+        for content in call_result.content:
+            if isinstance(content, TextContent):
+                print("Server says:", content.text)
+            else:
+                print("Server returned content block of type:", type(content))
 
 if __name__ == "__main__":
     asyncio.run(main())
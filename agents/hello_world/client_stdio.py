@@ -1,12 +1,217 @@
 #!/usr/bin/env python3
 import asyncio
+import os
+import subprocess
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from mcp import ClientSession
-from mcp.client.stdio import stdio_client, StdioServerParameters
+import anyio
+import mcp.types as types
+from mcp.client.stdio import StdioServerParameters, get_default_environment
+from mcp.shared.message import SessionMessage
 from mcp.types import TextContent
 
+from pipeline import pipelined_hello
+
+try:
+    # Optional: read the server's stdout through io_uring when available
+    import liburing
+except ImportError:
+    liburing = None
+
+# Seconds to wait for the server to exit after its stdin is closed
+PROCESS_TERMINATION_TIMEOUT = 2.0
+
+# Most JSON-RPC lines written to the server's stdin in a single write
+STDIN_BATCH_MAX = 16
+
+
+def _encode_line(session_message: SessionMessage) -> bytes:
+    message = session_message.message
+    # pydantic-core encodes straight to UTF-8 bytes
+    return message.__pydantic_serializer__.to_json(message, by_alias=True, exclude_none=True) + b"\n"
+
+
+class UringPipeReader:
+    """
+    Reads a pipe through io_uring and yields its chunks as an async iterator
+    of bytes that ends at EOF.
+
+    Completions are signalled on an eventfd that the event loop watches, so
+    nothing ever blocks inside io_uring (the binding holds the GIL while it
+    waits). Only one read is in flight at a time: several outstanding reads
+    on the same pipe may complete out of order.
+    """
+
+    RING_ENTRIES = 8
+    READ_SIZE = 65536
+
+    def __init__(self, fd: int):
+        self._fd = fd
+        self._ring = liburing.Ring()
+        self._cqe = liburing.Cqe()
+        self._buf = bytearray(self.READ_SIZE)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        liburing.io_uring_queue_init(self.RING_ENTRIES, self._ring)
+        try:
+            self._efd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+            liburing.io_uring_register_eventfd(self._ring, self._efd)
+        except OSError:
+            liburing.io_uring_queue_exit(self._ring)
+            raise
+
+    @classmethod
+    def open(cls, fd: int) -> "UringPipeReader | None":
+        """Return a reader for `fd`, or None if io_uring can't be used here."""
+        if liburing is None or not sys.platform.startswith("linux"):
+            return None
+        try:
+            return cls(fd)
+        except OSError:
+            # Kernel without io_uring, or blocked by seccomp (e.g. containers)
+            return None
+
+    def start(self) -> None:
+        self._loop.add_reader(self._efd, self._on_completion)
+        self._submit_read()
+
+    def _submit_read(self) -> None:
+        sqe = liburing.io_uring_get_sqe(self._ring)
+        liburing.io_uring_prep_read(sqe, self._fd, self._buf)
+        liburing.io_uring_submit(self._ring)
+
+    def _on_completion(self) -> None:
+        os.eventfd_read(self._efd)
+        try:
+            liburing.io_uring_peek_cqe(self._ring, self._cqe)
+        except BlockingIOError:
+            return
+        entry = self._cqe[0]
+        n = entry.res
+        liburing.io_uring_cqe_seen(self._ring, entry)
+        if n > 0:
+            self._queue.put_nowait(bytes(self._buf[:n]))
+            self._submit_read()
+            return
+        self._close()
+        self._queue.put_nowait(None if n == 0 else OSError(-n, os.strerror(-n)))
+
+    def _close(self) -> None:
+        self._loop.remove_reader(self._efd)
+        liburing.io_uring_queue_exit(self._ring)
+        os.close(self._efd)
+        os.close(self._fd)
+
+    async def __aiter__(self):
+        while isinstance(chunk := await self._queue.get(), bytes):
+            yield chunk
+        if chunk is not None:
+            raise chunk
+
+
+@asynccontextmanager
+async def stdio_client(server: StdioServerParameters):
+    """
+    Minimal replacement for mcp.client.stdio.stdio_client that reads the
+    server's stdout as raw bytes and splits JSON-RPC lines on b"\n", instead
+    of decoding every chunk to str first. Yields the same
+    (read_stream, write_stream) pair.
+    """
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+    env = {**get_default_environment(), **server.env} if server.env is not None else get_default_environment()
+
+    # With io_uring the child writes into a plain pipe that the event loop
+    # never polls; otherwise fall back to anyio's own stdout stream.
+    uring_reader = None
+    stdout = subprocess.PIPE
+    if liburing is not None:
+        rfd, wfd = os.pipe()
+        uring_reader = UringPipeReader.open(rfd)
+        if uring_reader is None:
+            os.close(rfd)
+            os.close(wfd)
+        else:
+            stdout = wfd
+    try:
+        process = await anyio.open_process(
+            [server.command, *server.args], env=env, stdout=stdout, stderr=sys.stderr, cwd=server.cwd
+        )
+    finally:
+        if uring_reader is not None:
+            os.close(stdout)  # the child holds its own copy of the write end
+    chunks = process.stdout
+    if uring_reader is not None:
+        uring_reader.start()
+        chunks = uring_reader
+
+    async def stdout_reader():
+        try:
+            async with read_stream_writer:
+                # One buffer for the whole session, holding only a partial
+                # trailing line; chunks that end on a line boundary are parsed
+                # in place and never copied into it.
+                buf = bytearray()
+                async for chunk in chunks:
+                    if buf:
+                        buf += chunk
+                        data = buf
+                    else:
+                        data = chunk
+                    start = 0
+                    while (i := data.find(b"\n", start)) != -1:
+                        line = data[start:i]
+                        start = i + 1
+                        try:
+                            # pydantic-core parses the UTF-8 bytes directly
+                            message = types.JSONRPCMessage.model_validate_json(line)
+                        except Exception as exc:
+                            await read_stream_writer.send(exc)
+                            continue
+                        await read_stream_writer.send(SessionMessage(message))
+                    if data is buf:
+                        del buf[:start]
+                    elif start < len(chunk):
+                        buf += memoryview(chunk)[start:]
+        except anyio.ClosedResourceError:
+            pass  # session closed the stream first
+
+    async def stdin_writer():
+        try:
+            async with write_stream_reader:
+                async for session_message in write_stream_reader:
+                    # Soft flush: queue up every request that is already
+                    # waiting and hand them to the pipe in one write; a lone
+                    # request is written immediately.
+                    pending = [_encode_line(session_message)]
+                    while len(pending) < STDIN_BATCH_MAX:
+                        try:
+                            pending.append(_encode_line(write_stream_reader.receive_nowait()))
+                        except (anyio.WouldBlock, anyio.EndOfStream):
+                            break
+                    await process.stdin.send(pending[0] if len(pending) == 1 else b"".join(pending))
+        except anyio.ClosedResourceError:
+            pass  # session closed the stream first
+
+    async with anyio.create_task_group() as tg, process:
+        tg.start_soon(stdout_reader)
+        tg.start_soon(stdin_writer)
+        try:
+            yield read_stream, write_stream
+        finally:
+            # Close the server's stdin, then give it a moment to exit on its own
+            await process.stdin.aclose()
+            try:
+                with anyio.fail_after(PROCESS_TERMINATION_TIMEOUT):
+                    await process.wait()
+            except TimeoutError:
+                process.kill()
+            await read_stream.aclose()
+            await write_stream.aclose()
+
 
 async def main():
     # Determine the path to the server script, relative to this client file
@@ -28,25 +233,18 @@ async def main():
     try:
         # Connect using the stdio transport
         async with stdio_client(server_params) as (read_stream, write_stream):
-            # Open an MCP client session over the transport streams
-            async with ClientSession(read_stream, write_stream) as session:
-                # Perform the initialization handshake
-                init_result = await session.initialize()
-                print(f"Initialized session: {init_result}")
-
-                # List available tools on the server
-                tools = await session.list_tools()
-                print("Available tools:", [tool.name for tool in tools.tools])
-
-                # Invoke the 'hello' tool (no arguments needed)
-                call_result = await session.call_tool(name="hello", arguments={})
-
-                # Iterate over content blocks in the result
-                for content in call_result.content:
-                    if isinstance(content, TextContent):
-                        print("Server says:", content.text)
-                    else:
-                        print("Server returned content block of type:", type(content))
+            # Initialize, list tools and invoke 'hello' (no arguments needed)
+            # in one pipelined round-trip
+            init_result, tools, call_result = await pipelined_hello(read_stream, write_stream)
+            print(f"Initialized session: {init_result}")
+            print("Available tools:", [tool.name for tool in tools.tools])
+
+            # Iterate over content blocks in the result
+            for content in call_result.content:
+                if isinstance(content, TextContent):
+                    print("Server says:", content.text)
+                else:
+                    print("Server returned content block of type:", type(content))
 
     except FileNotFoundError as e:
         print(f"Failed to start server process: {e}")
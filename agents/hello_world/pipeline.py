@@ -0,0 +1,96 @@
+"""
+Pipelined MCP startup shared by client_stdio.py and client_sse.py.
+
+The hello clients only need initialize → tools/list → tools/call, and the
+call does not depend on the tool list. Instead of three request/response
+round-trips through ClientSession, all three requests (plus the
+notifications/initialized that must sit between initialize and the rest)
+are written back to back, and the responses are matched up by id as they
+arrive. The server handles incoming messages in order, so it sees the same
+sequence it would from a sequential client.
+
+JSON-RPC batch arrays would collapse this into one frame, but MCP removed
+batching in protocol 2025-06-18, so messages are pipelined individually.
+"""
+import mcp.types as types
+from mcp.shared.exceptions import McpError
+from mcp.shared.message import SessionMessage
+from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+
+CLIENT_INFO = types.Implementation(name="hello-client", version="0.1.0")
+
+
+def _request(request_id: int, request) -> SessionMessage:
+    return SessionMessage(types.JSONRPCMessage(types.JSONRPCRequest(
+        jsonrpc="2.0",
+        id=request_id,
+        **request.model_dump(by_alias=True, mode="json", exclude_none=True),
+    )))
+
+
+async def _collect(read_stream, ids: set) -> dict:
+    """Read until every id in `ids` has a response or error; return them by id."""
+    replies = {}
+    while ids - replies.keys():
+        item = await read_stream.receive()
+        if isinstance(item, Exception):
+            raise item
+        message = item.message.root
+        # Server-initiated notifications (e.g. logging) are not needed here
+        if isinstance(message, (types.JSONRPCResponse, types.JSONRPCError)) and message.id in ids:
+            replies[message.id] = message
+    return replies
+
+
+async def pipelined_hello(read_stream, write_stream, tool_name: str = "hello", arguments: dict | None = None):
+    """
+    Initialize, list tools and call `tool_name` over an MCP transport's
+    (read_stream, write_stream) pair with a single round-trip.
+
+    Returns (InitializeResult, ListToolsResult, CallToolResult). A request
+    the server rejects in the pipelined pass is retried once on its own.
+    """
+    requests = {
+        0: types.InitializeRequest(
+            method="initialize",
+            params=types.InitializeRequestParams(
+                protocolVersion=types.LATEST_PROTOCOL_VERSION,
+                capabilities=types.ClientCapabilities(),
+                clientInfo=CLIENT_INFO,
+            ),
+        ),
+        1: types.ListToolsRequest(method="tools/list"),
+        2: types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name=tool_name, arguments=arguments or {}),
+        ),
+    }
+    initialized = SessionMessage(types.JSONRPCMessage(types.JSONRPCNotification(
+        jsonrpc="2.0", method="notifications/initialized",
+    )))
+
+    await write_stream.send(_request(0, requests[0]))
+    await write_stream.send(initialized)
+    await write_stream.send(_request(1, requests[1]))
+    await write_stream.send(_request(2, requests[2]))
+    replies = await _collect(read_stream, set(requests))
+
+    if isinstance(replies[0], types.JSONRPCError):
+        raise McpError(replies[0].error)
+    init_result = types.InitializeResult.model_validate(replies[0].result)
+    if init_result.protocolVersion not in SUPPORTED_PROTOCOL_VERSIONS:
+        raise RuntimeError(f"Unsupported protocol version from the server: {init_result.protocolVersion}")
+
+    # Fall back to one-at-a-time for anything the server refused up front
+    for request_id in (1, 2):
+        if isinstance(replies[request_id], types.JSONRPCError):
+            await write_stream.send(_request(request_id, requests[request_id]))
+            replies.update(await _collect(read_stream, {request_id}))
+            if isinstance(replies[request_id], types.JSONRPCError):
+                raise McpError(replies[request_id].error)
+
+    return (
+        init_result,
+        types.ListToolsResult.model_validate(replies[1].result),
+        types.CallToolResult.model_validate(replies[2].result),
+    )
@@ -1,36 +1,453 @@
-from starlette.applications import Starlette
+import asyncio
+import logging
+import logging.handlers
+import queue
+import zlib
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+from uuid import UUID, uuid4
+
+import anyio
+from pydantic import ValidationError
+from starlette.requests import Request
 from starlette.responses import Response
-from starlette.routing import Route, Mount
 from mcp.server.lowlevel import Server, NotificationOptions
 from mcp.server.sse import SseServerTransport
 from mcp.server.models import InitializationOptions
+from mcp.shared.message import ServerMessageMetadata, SessionMessage
 import mcp.types as types
 import uvicorn
 import os
+import sys
+
+logger = logging.getLogger(__name__)
 
 # 1) Low-level server
 server = Server("hello-world-sse")
 
 # 2) Tools
+#    The tool list never changes, so build it once instead of per request.
+_TOOLS = [
+    types.Tool(
+        name="hello",
+        description="Return a Hello World greeting",
+        inputSchema={"type":"object","properties":{},"required":[]},
+    )
+]
+
+# Constant result of the 'hello' tool
+_HELLO_CONTENT = [types.TextContent(type="text", text="Hello, SSE World!")]
+
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="hello",
-            description="Return a Hello World greeting",
-            inputSchema={"type":"object","properties":{},"required":[]},
-        )
-    ]
+    return _TOOLS
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Tool '%s' called with arguments: %s", name, arguments)
     if name == "hello":
-        return [types.TextContent(type="text", text="Hello, SSE World!")]
+        return _HELLO_CONTENT
     raise ValueError(f"Unknown tool: {name}")
 
 # 3) SSE transport
+def _build_sse_frame(event: bytes, data: bytes) -> bytes:
+    """Return one complete SSE event, already encoded and framed."""
+    return b"event: " + event + b"\ndata: " + data + b"\n\n"
+
+
+# Comment frame sent on idle streams so proxies don't drop the connection
+_SSE_PING_FRAME = b": ping\n\n"
+_SSE_PING_INTERVAL = 15.0
+
+# Upper bounds for coalescing already-queued messages into one ASGI send
+_SSE_BATCH_MAX_EVENTS = 16
+_SSE_BATCH_MAX_BYTES = 4096
+
+# How long outgoing frames may be held to be written together; set
+# SSE_FLUSH_DELAY_MS=0 to write every frame as soon as it is ready.
+_SSE_FLUSH_DELAY = float(os.environ.get("SSE_FLUSH_DELAY_MS", "2")) / 1000
+
+_SSE_H2_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-store"),
+    # Keep nginx from re-buffering the (possibly compressed) stream
+    (b"x-accel-buffering", b"no"),
+    (b"vary", b"accept-encoding"),
+]
+# HTTP/2 forbids connection-specific headers, so only HTTP/1.1 gets this one
+_SSE_HEADERS = _SSE_H2_HEADERS + [(b"connection", b"keep-alive")]
+_GZIP_HEADER = (b"content-encoding", b"gzip")
+# Response header lists keyed by (is_http2, gzip), so no stream builds its own
+_SSE_RESPONSE_HEADERS = {
+    (False, False): _SSE_HEADERS,
+    (False, True): _SSE_HEADERS + [_GZIP_HEADER],
+    (True, False): _SSE_H2_HEADERS,
+    (True, True): _SSE_H2_HEADERS + [_GZIP_HEADER],
+}
+
+# Most idle ThrottledSenders kept for reuse by later connections
+_SENDER_POOL_SIZE = 32
+
+# The reply to every well-formed POSTed message, built once
+_ACCEPTED_START = {
+    "type": "http.response.start",
+    "status": 202,
+    "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", b"8")],
+}
+_ACCEPTED_BODY = {"type": "http.response.body", "body": b"Accepted"}
+
+
+def _accepts_gzip(scope) -> bool:
+    """Whether Accept-Encoding allows gzip: listed, or covered by "*", with q above 0."""
+    q_values = {}
+    for key, value in scope["headers"]:
+        if key != b"accept-encoding":
+            continue
+        for coding in value.lower().split(b","):
+            name, _, params = coding.partition(b";")
+            q = 1.0
+            for param in params.split(b";"):
+                param_name, _, param_value = param.partition(b"=")
+                if param_name.strip() == b"q":
+                    try:
+                        q = float(param_value)
+                    except ValueError:
+                        q = 0.0
+            q_values[name.strip()] = q
+    q = q_values.get(b"gzip", q_values.get(b"x-gzip", q_values.get(b"*", 0.0)))
+    return q > 0
+
+
+def _message_frame(session_message) -> bytes:
+    """Serialize one outgoing session message into a complete SSE frame."""
+    message = session_message.message
+    # pydantic-core serializes straight to UTF-8 bytes
+    data = message.__pydantic_serializer__.to_json(message, by_alias=True, exclude_none=True)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Sending message via SSE: %s", data.decode())
+    return _build_sse_frame(b"message", data)
+
+
+async def _get_message_with_timeout(pending: asyncio.Future, timeout: float):
+    """
+    Wait up to `timeout` seconds for `pending` and return its result, or None
+    if it is still running. Unlike asyncio.wait_for() this neither raises
+    TimeoutError nor cancels the receive, so the same future can be awaited
+    again on the next keepalive tick without losing a message.
+    """
+    done, _ = await asyncio.wait({pending}, timeout=timeout)
+    if not done:
+        return None
+    return pending.result()
+
+
+class ThrottledSender:
+    """
+    Collects SSE frames written in quick succession and hands them to `write`
+    as one chunk, either `max_delay` seconds after the first pending frame or
+    as soon as `max_bytes` are pending. A `max_delay` of 0 disables grouping.
+
+    Timed flushes run in a background task; if `write` fails there, the error
+    is kept and raised from the next write() or flush(), so the caller still
+    learns that the response is gone.
+    """
+
+    def __init__(self, write, max_delay: float = 0.002, max_bytes: int = 4096):
+        self._write = write
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self._buf = bytearray()
+        self._lock = asyncio.Lock()
+        self._timer = None
+        self._task = None
+        self._error = None
+
+    def reset(self, write):
+        """Point a closed sender at a new connection's `write`."""
+        self._write = write
+        self._task = None
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    async def _send(self, data: bytes):
+        try:
+            await self._write(data)
+        except Exception as exc:
+            self._error = exc
+            raise
+
+    async def write(self, frame: bytes):
+        self._check()
+        if self.max_delay <= 0:
+            await self._send(frame)
+            return
+        self._buf += frame
+        if len(self._buf) >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._timer = None
+        self._task = asyncio.ensure_future(self._timed_flush())
+
+    async def _timed_flush(self):
+        try:
+            await self.flush()
+        except Exception:
+            pass  # kept in self._error by _send(), raised on the next write()/flush()
+
+    async def flush(self):
+        self._check()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # The lock keeps chunks in order when a timed flush and a size-triggered
+        # one overlap; frames written meanwhile wait for the next flush.
+        async with self._lock:
+            if self._buf:
+                data = bytes(self._buf)
+                self._buf.clear()
+                await self._send(data)
+
+    def close(self):
+        """Drop pending work once the response is over."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None:
+            self._task.cancel()
+        self._buf.clear()
+
+    @property
+    def reusable(self) -> bool:
+        """True once closed without a failed write and with no timed flush still unwinding."""
+        return self._error is None and self._timer is None and (self._task is None or self._task.done())
+
+
+class ByteFrameSseTransport(SseServerTransport):
+    """
+    SseServerTransport that writes pre-built byte frames straight to the ASGI
+    `send`, instead of handing dicts to sse_starlette which formats them as
+    `str` and re-encodes every event.
+
+    The memory object streams can't be reopened once closed, so they are
+    still created per connection; what is recycled are the write-side
+    ThrottledSenders (buffer + lock) and the quoted POST path prefix.
+    """
+
+    def __init__(self, endpoint: str, security_settings=None):
+        super().__init__(endpoint, security_settings)
+        self._senders = deque(maxlen=_SENDER_POOL_SIZE)
+        self._post_prefixes = {}
+
+    def _acquire_sender(self, write) -> ThrottledSender:
+        if self._senders:
+            sender = self._senders.pop()
+            sender.reset(write)
+            return sender
+        return ThrottledSender(write, max_delay=_SSE_FLUSH_DELAY, max_bytes=_SSE_BATCH_MAX_BYTES)
+
+    def _release_sender(self, sender: ThrottledSender):
+        sender.close()
+        if sender.reusable:
+            self._senders.append(sender)
+
+    def _post_prefix(self, root_path: str) -> str:
+        prefix = self._post_prefixes.get(root_path)
+        if prefix is None:
+            prefix = self._post_prefixes[root_path] = quote(root_path.rstrip("/") + self._endpoint) + "?session_id="
+        return prefix
+
+    @asynccontextmanager
+    async def connect_sse(self, scope, receive, send):
+        if scope["type"] != "http":
+            raise ValueError("connect_sse can only handle HTTP requests")
+
+        # Same DNS rebinding protection as the stock transport
+        request = Request(scope, receive)
+        error_response = await self._security.validate_request(request, is_post=False)
+        if error_response:
+            await error_response(scope, receive, send)
+            raise ValueError("Request validation failed")
+
+        read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+        write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+
+        session_id = uuid4()
+        self._read_stream_writers[session_id] = read_stream_writer
+        logger.debug("Created new SSE session %s", session_id)
+
+        # URI (path + query) the client will POST its messages to
+        post_uri = self._post_prefix(scope.get("root_path", "")) + session_id.hex
+
+        # The JSON frames are highly repetitive, so gzip the stream for clients
+        # that accept it. Starlette's GZipMiddleware deliberately skips
+        # text/event-stream; a sync flush per chunk keeps events from being
+        # held back in the compressor.
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if _accepts_gzip(scope) else None
+
+        async def send_body(body: bytes, more_body: bool = True):
+            if compressor is not None:
+                if more_body:
+                    body = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                else:
+                    body = compressor.compress(body) + compressor.flush()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        async def sse_writer():
+            headers = _SSE_RESPONSE_HEADERS[scope.get("http_version") == "2", compressor is not None]
+            await send({"type": "http.response.start", "status": 200, "headers": headers})
+            await send_body(_build_sse_frame(b"endpoint", post_uri.encode()))
+            sender = self._acquire_sender(send_body)
+            pending = None
+            try:
+                async with write_stream_reader:
+                    while True:
+                        if pending is None:
+                            pending = asyncio.ensure_future(write_stream_reader.receive())
+                        try:
+                            session_message = await _get_message_with_timeout(pending, _SSE_PING_INTERVAL)
+                        except anyio.EndOfStream:
+                            break
+                        if session_message is None:
+                            await sender.write(_SSE_PING_FRAME)
+                            continue
+                        pending = None
+
+                        # Pick up whatever else is already waiting and send it
+                        # in the same body chunk; each message keeps its own
+                        # event frame. Nothing waits here; the only delay is
+                        # the throttler's flush window.
+                        frames = [_message_frame(session_message)]
+                        size = len(frames[0])
+                        closed = False
+                        while len(frames) < _SSE_BATCH_MAX_EVENTS and size < _SSE_BATCH_MAX_BYTES:
+                            try:
+                                frame = _message_frame(write_stream_reader.receive_nowait())
+                            except anyio.WouldBlock:
+                                break
+                            except anyio.EndOfStream:
+                                closed = True
+                                break
+                            frames.append(frame)
+                            size += len(frame)
+                        await sender.write(frames[0] if len(frames) == 1 else b"".join(frames))
+                        if closed:
+                            break
+                await sender.flush()
+            finally:
+                self._release_sender(sender)
+                if pending is not None:
+                    pending.cancel()
+            await send_body(b"", more_body=False)
+
+        async def response_wrapper():
+            """
+            Stream until either side is done: the server closing its write
+            stream, or the client disconnecting.
+            """
+            async with anyio.create_task_group() as tg:
+                async def write_then_stop():
+                    await sse_writer()
+                    tg.cancel_scope.cancel()
+
+                tg.start_soon(write_then_stop)
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                tg.cancel_scope.cancel()
+
+            self._read_stream_writers.pop(session_id, None)
+            logger.debug("Client session disconnected %s", session_id)
+            await read_stream_writer.aclose()
+            await write_stream_reader.aclose()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(response_wrapper)
+            yield (read_stream, write_stream)
+
+    async def handle_post_message(self, scope, receive, send):
+        """
+        Same contract as the stock handler, but without its eagerly formatted
+        debug strings (which repr() the body and the parsed model on every
+        request) and with a prebuilt 202 reply.
+        """
+        request = Request(scope, receive)
+        error_response = await self._security.validate_request(request, is_post=True)
+        if error_response:
+            return await error_response(scope, receive, send)
+
+        session_id_param = request.query_params.get("session_id")
+        if session_id_param is None:
+            return await Response("session_id is required", status_code=400)(scope, receive, send)
+        try:
+            session_id = UUID(hex=session_id_param)
+        except ValueError:
+            return await Response("Invalid session ID", status_code=400)(scope, receive, send)
+        writer = self._read_stream_writers.get(session_id)
+        if not writer:
+            return await Response("Could not find session", status_code=404)(scope, receive, send)
+
+        body = await request.body()
+        try:
+            # Validated straight from the raw bytes by pydantic-core
+            message = types.JSONRPCMessage.model_validate_json(body)
+        except ValidationError as err:
+            logger.warning("Could not parse message for session %s", session_id)
+            await Response("Could not parse message", status_code=400)(scope, receive, send)
+            await writer.send(err)
+            return
+
+        await send(_ACCEPTED_START)
+        await send(_ACCEPTED_BODY)
+        await writer.send(SessionMessage(message, metadata=ServerMessageMetadata(request_context=request)))
+
+
 #    Make sure this matches the routes below.
-sse = SseServerTransport(endpoint="/messages/")
+sse = ByteFrameSseTransport(endpoint="/messages/")
+
+
+class AdmissionGate:
+    """
+    Caps the number of concurrently open SSE streams. The count lives next to
+    an asyncio.Condition rather than inside an asyncio.Semaphore, whose
+    private counter can't be safely changed at runtime, so `resize()` works
+    while clients are connected: raising the limit wakes queued clients,
+    lowering it only holds back new ones.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._cond = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._cond:
+            while self.active >= self.limit:
+                await self._cond.wait()
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.active -= 1
+                self._cond.notify(1)
+
+    async def resize(self, limit: int):
+        async with self._cond:
+            grew = limit > self.limit
+            self.limit = limit
+            if grew:
+                self._cond.notify_all()
+
+
+# Clients beyond the limit wait for a free slot before their stream opens
+admission = AdmissionGate(int(os.environ.get("SSE_MAX_CLIENTS", "128")))
 
 # 4) ASGI endpoint for GET + POST on the same path
 async def messages_asgi(scope, receive, send):
@@ -40,7 +457,7 @@ async def messages_asgi(scope, receive, send):
       - POST /messages/ → client→server messages
     """
     if scope["method"] == "GET":
-        async with sse.connect_sse(scope, receive, send) as (r, w):
+        async with admission.slot(), sse.connect_sse(scope, receive, send) as (r, w):
             await server.run(
                 r, w,
                 InitializationOptions(
@@ -56,16 +473,91 @@ async def messages_asgi(scope, receive, send):
     else:  # POST
         await sse.handle_post_message(scope, receive, send)
 
-# 5) Starlette app (including a /health endpoint for the doctor)
-async def health_check(request):
-    return Response("OK", media_type="text/plain")
+# 5) ASGI app (including a /health endpoint for the doctor)
+#    Dispatched by hand: with one prefix and one exact path there is
+#    nothing for a regex router to do.
+_HEALTH_START = {
+    "type": "http.response.start",
+    "status": 200,
+    "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", b"2")],
+}
+_HEALTH_BODY = {"type": "http.response.body", "body": b"OK"}
+_NOT_FOUND_START = {
+    "type": "http.response.start",
+    "status": 404,
+    "headers": [(b"content-type", b"text/plain; charset=utf-8"), (b"content-length", b"9")],
+}
+_NOT_FOUND_BODY = {"type": "http.response.body", "body": b"Not Found"}
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return  # no lifespan or websocket handling needed
+    path = scope["path"]
+    if path.startswith("/messages/"):
+        return await messages_asgi(scope, receive, send)
+    if path == "/health":
+        await send(_HEALTH_START)
+        await send(_HEALTH_BODY)
+        return
+    await send(_NOT_FOUND_START)
+    await send(_NOT_FOUND_BODY)
+
+def _start_log_listener() -> logging.handlers.QueueListener:
+    """
+    Route this module's records through a QueueHandler, so the event loop
+    only enqueues them; a listener thread does the actual stream writes.
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:     %(message)s"))
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+def _serve_http2(port: int, certfile: str, keyfile: str) -> None:
+    """
+    Serve over TLS through hypercorn, which negotiates HTTP/2 via ALPN, so
+    every SSE stream from one client shares a single connection instead of
+    hitting the ~6-connections-per-origin limit of HTTP/1.1.
+    """
+    try:
+        from hypercorn.asyncio import serve  # optional dependency
+        from hypercorn.config import Config
+    except ImportError:
+        sys.exit("ERROR: SSL_CERTFILE/SSL_KEYFILE need hypercorn; install it with: poetry install --extras http2")
 
-app = Starlette(routes=[
-    Mount("/messages/", app=messages_asgi),
-    Route("/health", endpoint=health_check),
-])
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.alpn_protocols = ["h2", "http/1.1"]
+    config.certfile = certfile
+    config.keyfile = keyfile
+    config.accesslog = None
+    config.loglevel = "WARNING"
+    asyncio.run(serve(app, config))
 
 if __name__ == "__main__":
     # Read the port from the environment variable, defaulting to 8000 if not set.
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="127.0.0.1", port=port)
+    listener = _start_log_listener()
+    # HTTP/2 needs TLS in browsers, so it is only used when a cert is given
+    certfile = os.environ.get("SSL_CERTFILE")
+    keyfile = os.environ.get("SSL_KEYFILE")
+    if certfile and keyfile:
+        _serve_http2(port, certfile, keyfile)
+    else:
+        uvicorn.run(
+            app,
+            host="127.0.0.1",
+            port=port,
+            # No per-request access log lines; uvicorn itself only reports problems
+            access_log=False,
+            log_level="warning",
+            # libuv event loop + C HTTP parser; the app is SSE-only, so no websockets
+            loop="asyncio" if sys.platform == "win32" else "uvloop",
+            http="httptools",
+            ws="none",
+        )
+    listener.stop()
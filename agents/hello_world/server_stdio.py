@@ -9,20 +9,26 @@ import mcp.types as types
 server = Server("hello-world-stdio")
 
 # 2) Tools
+#    The tool list never changes, so build it once instead of per request.
+_TOOLS = [
+    types.Tool(
+        name="hello",
+        description="Return a Hello World greeting",
+        inputSchema={"type":"object","properties":{},"required":[]},
+    )
+]
+
+# Constant result of the 'hello' tool
+_HELLO_CONTENT = [types.TextContent(type="text", text="Hello, stdio World!")]
+
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
-    return [
-        types.Tool(
-            name="hello",
-            description="Return a Hello World greeting",
-            inputSchema={"type":"object","properties":{},"required":[]},
-        )
-    ]
+    return _TOOLS
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     if name == "hello":
-        return [types.TextContent(type="text", text="Hello, stdio World!")]
+        return _HELLO_CONTENT
     raise ValueError(f"Unknown tool: {name}")
 
 # 3) Entrypoint over stdio
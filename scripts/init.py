@@ -12,8 +12,11 @@ What this tool does
 
 2) Adds entries to the index:
    - add-url    : A single remote manifest URL (Form B preferred; falls back to A).
+   - add-urls   : Many manifest URLs from a file or stdin, one per line, with one write.
    - add-entry  : (path, base_url) pair (Form C).
    - add-inline : Copy a local manifest into ./matrix/ and add a Form-C entry.
+   - bulk       : Apply many add/scaffold operations from a JSONL file with one write.
+   - session    : Keep the index in memory and run commands read from stdin.
 
 3) Scaffolds valid manifest files (JSON) for Matrix-Hub validation:
    - scaffold-server : Generates a minimal mcp_server manifest (with mcp_registration).
@@ -42,54 +45,217 @@ Typical workflows
   # Serve repo root so Hub can fetch:  python3 -m http.server 8001
   # In Hub .env: CATALOG_REMOTES=["http://127.0.0.1:8001/matrix/index.json"]
 
+# C) Many operations at once (instead of a shell loop over single commands)
+  # ops.jsonl, one {"op": ..., "args": {...}} record per line, e.g.
+  #   {"op": "add-url", "args": {"manifest_url": "https://your.host/a.manifest.json"}}
+  #   {"op": "add-entry", "args": {"path": "b.manifest.json", "base_url": "https://your.host/matrix/"}}
+  ./scripts/init.py bulk ops.jsonl
+  # or stream commands (any subcommand, options as keys) into a resident session:
+  #   {"cmd": "add-url", "manifest_url": "https://your.host/a.manifest.json"}
+  #   {"cmd": "flush"}
+  cat cmds.jsonl | ./scripts/init.py session --out matrix/index.json
+
 Notes
 -----
 - Matrix-Hub validates manifests against its internal JSON Schemas; the scaffolds here
   include the minimal required fields: type, id, version, name, and optional metadata.
 - You can use --out to select a different index file (defaults to matrix/index.json).
+- Files are written as compact JSON; put --pretty before the subcommand for
+  indented output (e.g. ./scripts/init.py --pretty init-empty).
+- scaffold-tool also takes --input-schema-file / --output-schema-file; the file's
+  JSON is embedded as-is (only checked for validity, never re-encoded).
+- Every write goes to "<file>.tmp" and is renamed into place, so an interrupted
+  run never leaves a half-written index; add --durable to also fsync.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
-import shutil
-from dataclasses import dataclass, asdict
+import os
+import re
 from datetime import datetime, timezone
 from pathlib import Path
 import sys
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+try:
+    import orjson  # optional: C parser/serializer, much faster on large indexes
+except ImportError:
+    orjson = None
 
 DEFAULT_INDEX_PATH = Path("matrix/index.json")
 VALID_SHAPES = ("manifests", "items", "entries")
 
+# Indexes already loaded or created by this process (absolute path -> idx), so
+# repeated ensure_index calls skip the stat and the parse. An entry for a path
+# that doesn't exist yet doubles as the negative cache. replace_file() drops
+# the entry for whatever it overwrites; persist_index() then re-adds it.
+_INDEX_STATE: Dict[Path, dict] = {}
+# While `session` runs, persist_index only marks indexes dirty; they are
+# written on flush/EOF.
+_DIRTY: set = set()
+_IN_SESSION = False
+
+# Output is compact JSON unless the top-level --pretty flag is given
+_PRETTY = False
+# Writes are always atomic; --durable also fsyncs them before the rename
+_DURABLE = False
+
 
 # -------------------- IO helpers --------------------
 
+# bulk/session pin one timestamp for all of their changes; None = compute per call
+_NOW: Optional[str] = None
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
 def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    return _NOW or _utc_now()
+
+
+def _reject_constant(name: str) -> Any:
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def _finite_float(text: str) -> float:
+    value = float(text)
+    if value in (float("inf"), float("-inf")):
+        raise ValueError(f"{text} is out of range for a float")
+    return value
+
+
+# orjson turns integers beyond 64 bits into floats, so input with a run of 19+
+# digits goes to the stdlib (mapping digits to "0" first keeps the check in C)
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_DIGITS = b"0" * 19
+
+
+def loads_json(data) -> Any:
+    """
+    Parse JSON from bytes or str with orjson when available, else the stdlib.
+    Either way NaN/Infinity (and floats that overflow to them) are rejected,
+    since orjson would write them back as null.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    if orjson is not None and _LONG_DIGITS not in data.translate(_DIGITS_TO_ZERO):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # let the stdlib report the error
+    return json.loads(data, parse_constant=_reject_constant, parse_float=_finite_float)
+
+
+def dumps_json(obj: Any, pretty: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes, compact or indented by 2. Both engines lay
+    out the document the same way; only float spelling may differ (1e16 vs 1e+16).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
 
 def load_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    return loads_json(path.read_bytes())
 
 
-def write_json(path: Path, obj: dict) -> None:
+def replace_file(path: Path, *chunks: bytes) -> None:
+    """
+    Write chunks to a sibling "<name>.tmp" and rename it over path, so readers
+    (and a crash mid-write) only ever see the old or the new file. With
+    --durable the data, and then the rename, are fsynced as well.
+    """
+    _INDEX_STATE.pop(_state_key(path), None)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False)
-        f.write("\n")
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            if _DURABLE:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if _DURABLE and os.name == "posix":
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_json(path: Path, obj: dict, pretty: Optional[bool] = None, raw: Optional[Dict[str, bytes]] = None) -> None:
+    """
+    Write obj as JSON: compact by default (the files are machine-maintained and
+    fetched by Matrix-Hub), indented with pretty=True or the global --pretty.
+    `raw` maps placeholder strings used as values in obj to already-serialized
+    JSON, which is spliced in verbatim in their place.
+    """
+    data = dumps_json(obj, _PRETTY if pretty is None else pretty)
+    for placeholder, chunk in (raw or {}).items():
+        data = data.replace(dumps_json(placeholder), chunk, 1)
+    replace_file(path, data, b"\n")
 
 
 # -------------------- Index scaffolding --------------------
 
-def ensure_index(path: Path, shape: Optional[str] = None) -> dict:
+def _state_key(path: Path) -> Path:
+    # abspath is string-only; resolve() would stat every path component
+    return Path(os.path.abspath(path))
+
+
+def invalidate(path: Optional[Path] = None) -> None:
+    """Forget the cached state of one index, or of all of them."""
+    if path is None:
+        _INDEX_STATE.clear()
+    else:
+        _INDEX_STATE.pop(_state_key(path), None)
+
+
+def ensure_index(path: Path, shape: Optional[str] = None, write: bool = True) -> dict:
     """
     Create minimal index if missing; else load existing.
     If creating new and 'shape' is omitted, default to 'items' (Form B).
+    With write=False a new index is only built in memory (the caller persists it).
     """
-    if path.exists():
+    key = _state_key(path)
+    idx = _INDEX_STATE.get(key)
+    if idx is None:
+        exists = path.exists()
+        idx = _load_or_create_index(path, shape, exists, write=write and not _IN_SESSION)
+        idx["__shape__"] = _detect_shape(idx)
+        _INDEX_STATE[key] = idx
+        if _IN_SESSION and not exists:
+            _DIRTY.add(key)
+    if shape == "entries" and "entries" not in idx:
+        # add_entry indexes idx["entries"] directly
+        idx["entries"] = []
+    return idx
+
+
+def _detect_shape(idx: dict) -> Optional[str]:
+    """The list add_manifest_url appends to: 'items' wins over 'manifests'; else 'entries' or None."""
+    for key in ("items", "manifests", "entries"):
+        if isinstance(idx.get(key), list):
+            return key
+    return None
+
+
+def _load_or_create_index(path: Path, shape: Optional[str], exists: bool, write: bool) -> dict:
+    if exists:
         try:
             return load_json(path)
         except Exception as e:
@@ -99,91 +265,279 @@ def ensure_index(path: Path, shape: Optional[str] = None) -> dict:
     if shape not in VALID_SHAPES:
         sys.exit(f"ERROR: shape must be one of {VALID_SHAPES}, got {shape!r}")
 
-    idx: dict = {}
-    if shape == "manifests":
-        idx["manifests"] = []
-    elif shape == "items":
-        idx["items"] = []
-    else:
-        idx["entries"] = []
-
+    idx: dict = {shape: []}
     idx["meta"] = {
         "format": "matrix-hub-index",
         "version": 1,
         "generated_by": "scripts/init.py",
         "created_at": now_iso(),
     }
-    write_json(path, idx)
+    if write:
+        write_json(path, idx)
+        _INDEX_STATE[_state_key(path)] = idx
     return idx
 
 
+# Keys this file adds to an in-memory idx; they are never written to disk
+_HELPER_KEYS = frozenset({"__seen__", "__shape__"})
+
+
+def _public(idx: dict) -> dict:
+    """The index without the in-memory helper keys, as it is written to disk."""
+    return {k: v for k, v in idx.items() if k not in _HELPER_KEYS}
+
+
 def persist_index(path: Path, idx: dict) -> None:
-    idx.setdefault("meta", {})["updated_at"] = now_iso()
-    write_json(path, idx)
+    meta = idx.get("meta")
+    if meta is None:
+        meta = idx["meta"] = {}
+    meta["updated_at"] = now_iso()
+    key = _state_key(path)
+    if _IN_SESSION:
+        _INDEX_STATE[key] = idx
+        _DIRTY.add(key)
+        return
+    write_json(path, _public(idx))
+    _INDEX_STATE[key] = idx
+
+
+def flush_indexes() -> int:
+    """Write every index changed during the session; returns how many were written."""
+    written = 0
+    for key in sorted(_DIRTY):
+        idx = _INDEX_STATE[key]
+        write_json(key, _public(idx))
+        _INDEX_STATE[key] = idx
+        written += 1
+    _DIRTY.clear()
+    return written
 
 
 # -------------------- Dedup helpers --------------------
+#
+# Membership is checked against one set built from the index lists on first
+# use and kept on the idx itself under "__seen__" (dropped by _public() when
+# writing), so repeated adds in bulk/session mode don't rescan the lists.
+# Every record is reduced to the manifest URL it resolves to (a Form C entry
+# to base_url and path joined by a single slash), so the same manifest added once by URL and
+# once as an entry is caught whichever shape holds it. ensure_index likewise
+# records the index's shape once under "__shape__".
+
+def _entry_url(path: Any, base_url: Any) -> str:
+    """Where a Form C entry points: base_url + "/" + path with one slash between (absolute paths as-is)."""
+    path = path if isinstance(path, str) else ""
+    if "://" in path:
+        return path
+    base_url = base_url if isinstance(base_url, str) else ""
+    return base_url.rstrip("/") + "/" + path.lstrip("/")
+
+
+def _seen(idx: dict) -> set:
+    seen = idx.get("__seen__")
+    if seen is None:
+        seen = idx["__seen__"] = set()
+        items, manifests, entries = idx.get("items"), idx.get("manifests"), idx.get("entries")
+        if isinstance(items, list):
+            seen.update(it.get("manifest_url") for it in items if isinstance(it, dict))
+        if isinstance(manifests, list):
+            seen.update(m for m in manifests if isinstance(m, str))
+        if isinstance(entries, list):
+            seen.update(_entry_url(e.get("path"), e.get("base_url")) for e in entries if isinstance(e, dict))
+    return seen
+
 
 def add_manifest_url(idx: dict, url: str) -> bool:
     """
     Append a manifest URL either to Form B ("items") or Form A ("manifests").
-    Returns True if new, False if duplicate.
+    Returns True if new, False if duplicate (in any of the three lists).
     """
-    if "items" in idx:
-        items = idx.setdefault("items", [])
-        if not any(isinstance(it, dict) and it.get("manifest_url") == url for it in items):
-            items.append({"manifest_url": url})
-            return True
-        return False
-    if "manifests" in idx:
-        mans = idx.setdefault("manifests", [])
-        if url not in mans:
-            mans.append(url)
-            return True
+    seen = _seen(idx)
+    if url in seen:
         return False
-    # No supported key found; default to items
-    idx["items"] = [{"manifest_url": url}]
+    seen.add(url)
+    shape = idx.get("__shape__") or _detect_shape(idx)
+    if shape == "items":
+        idx["items"].append({"manifest_url": url})
+    elif shape == "manifests":
+        idx["manifests"].append(url)
+    else:
+        # No URL list yet (empty or entries-only index); default to items
+        idx["items"] = [{"manifest_url": url}]
+        idx["__shape__"] = "items"
     return True
 
 
+def add_manifest_urls(idx: dict, urls: Sequence[str]) -> List[str]:
+    """
+    add_manifest_url for many URLs: one set difference against the index and
+    one extend of its URL list. Returns the URLs that were new, in input order.
+    """
+    seen = _seen(idx)
+    new = [url for url in dict.fromkeys(urls) if url not in seen]
+    if not new:
+        return new
+    seen.update(new)
+    shape = idx.get("__shape__") or _detect_shape(idx)
+    if shape == "manifests":
+        idx["manifests"].extend(new)
+    else:
+        if shape != "items":
+            # No URL list yet (empty or entries-only index); default to items
+            idx["items"] = []
+            idx["__shape__"] = "items"
+        idx["items"].extend([{"manifest_url": url} for url in new])
+    return new
+
+
 def add_entry(idx: dict, path: str, base_url: str) -> bool:
     """
     Append a Form C entry: {"path": path, "base_url": base_url}.
-    Returns True if new, False if duplicate.
+    idx must already have its "entries" list (ensure_index(..., shape="entries")).
+    Returns True if new, False if duplicate (in any of the three lists).
     """
-    entries = idx.setdefault("entries", [])
-    dupe = any(
-        isinstance(e, dict) and e.get("path") == path and e.get("base_url") == base_url
-        for e in entries
-    )
-    if dupe:
+    seen = _seen(idx)
+    url = _entry_url(path, base_url)
+    if url in seen:
         return False
-    entries.append({"path": path, "base_url": base_url})
+    seen.add(url)
+    idx["entries"].append({"path": path, "base_url": base_url})
     return True
 
 
-# -------------------- Manifest scaffolds --------------------
+# -------------------- Streaming append --------------------
+
+# Layouts written by write_json (pretty → compact): the shape list opens the
+# file, "meta" closes it. Per layout: head, meta key, and what precedes the
+# "]" of a non-empty list.
+_LAYOUTS = {
+    True: (re.compile(rb'\{\n  "(manifests|items|entries)": \['), b'\n  "meta": ', b"\n  "),
+    False: (re.compile(rb'\{"(manifests|items|entries)":\['), b'"meta":', b""),
+}
 
-@dataclass
-class BaseManifest:
-    type: str
-    id: str
-    version: str
-    name: str
-    summary: Optional[str] = None
-    description: Optional[str] = None
-    license: Optional[str] = None
-    homepage: Optional[str] = None
-    publisher: Optional[str] = None
 
+def append_entry_streaming(path: Path, shape_key: str, new_obj: Any, dedup_value: str) -> bool:
+    """
+    Append new_obj to the `shape_key` list of an existing index without parsing
+    the list: only the trailing "meta" object is decoded (to bump updated_at).
+    The new file is the old bytes up to the end of the list, the new element
+    and the re-encoded meta, swapped in with replace_file().
+
+    Returns False, leaving the file untouched, whenever the fast path can't be
+    used safely: the file is missing or not laid out as write_json writes it
+    in the current (compact or --pretty) style, it has a different or
+    additional shape key, some string in it ends with `dedup_value` (the URL
+    or the last segment of the path being added), or it uses "\\/" or "\\u"
+    escapes, which that literal duplicate check can't see through. Callers
+    then fall back to the full load/dedup/persist path, which also gives a
+    definitive duplicate answer.
+    """
+    import mmap  # only needed by this fast path
 
-def write_manifest(dest_dir: Path, filename: str, data: Dict[str, Any]) -> Path:
+    probe = dumps_json(dedup_value)[1:]  # no opening quote: matches as a suffix
+    # json.dump(indent=2) writers escape non-ASCII, so the probe could miss
+    if not probe.isascii() or not path.is_file() or path.stat().st_size == 0:
+        return False
+    head_re, meta_key, list_end = _LAYOUTS[_PRETTY]
+    with path.open("rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            head = head_re.match(mm, 0, 32)
+            if head is None or head.group(1) != shape_key.encode():
+                return False
+            # The probe is matched literally, so an escaped spelling of the same
+            # string (e.g. "https:\/\/..." from other writers) would slip past it
+            if mm.find(probe) != -1 or mm.find(b"\\/") != -1 or mm.find(b"\\u") != -1:
+                return False
+            for other in VALID_SHAPES:
+                if other != shape_key and mm.find(b'"%s":' % other.encode()) != -1:
+                    return False
+            meta_pos = mm.rfind(meta_key)
+            # The list must close right before "meta"
+            if meta_pos == -1 or mm[meta_pos - 2:meta_pos] != b"],":
+                return False
+            close = meta_pos - 2
+            empty = mm[close - 1:close] == b"["
+            if not empty and mm[close - len(list_end):close] != list_end:
+                return False
+            tail = mm[meta_pos + len(meta_key):].rstrip()
+            if not tail.endswith(b"}"):
+                return False
+            try:
+                meta = loads_json(tail[:-1])
+            except ValueError:
+                return False
+            if not isinstance(meta, dict):
+                return False
+            keep = mm[:close if empty else close - len(list_end)]
+
+    meta["updated_at"] = now_iso()
+    if _PRETTY:
+        elem = b"\n    " + dumps_json(new_obj, True).replace(b"\n", b"\n    ") + b"\n  ],"
+        end = dumps_json(meta, True).replace(b"\n", b"\n  ") + b"\n}\n"
+    else:
+        elem = dumps_json(new_obj) + b"],"
+        end = dumps_json(meta) + b"}\n"
+    replace_file(path, keep, b"" if empty else b",", elem, meta_key, end)
+    return True
+
+
+# -------------------- Manifest scaffolds --------------------
+
+def _manifest_base(
+    type_: str,
+    id_: str,
+    version: str,
+    name: str,
+    summary: Optional[str] = None,
+    description: Optional[str] = None,
+    license: Optional[str] = None,
+    homepage: Optional[str] = None,
+    publisher: Optional[str] = None,
+) -> Dict[str, Any]:
+    """The fields every manifest starts with; optional ones are left out when unset."""
+    d: Dict[str, Any] = {"type": type_, "id": id_, "version": version, "name": name}
+    if summary is not None:
+        d["summary"] = summary
+    if description is not None:
+        d["description"] = description
+    if license is not None:
+        d["license"] = license
+    if homepage is not None:
+        d["homepage"] = homepage
+    if publisher is not None:
+        d["publisher"] = publisher
+    return d
+
+
+def write_manifest(dest_dir: Path, filename: str, data: Dict[str, Any],
+                   raw: Optional[Dict[str, bytes]] = None) -> Path:
     dest_dir.mkdir(parents=True, exist_ok=True)
     path = dest_dir / filename
-    write_json(path, data)
+    write_json(path, data, raw=raw)
     return path
 
 
+# Prefix of the placeholders write_json replaces with raw JSON; random per run
+# so it can't collide with anything a user passes in
+_RAW_PLACEHOLDER = f"__RAW_{os.urandom(8).hex()}__"
+
+
+def _read_raw_json(path: Path) -> bytes:
+    """
+    Read a JSON file to embed as-is; it is parsed once, only to check it is
+    valid. The check is strict (UTF-8 without a BOM, no NaN/Infinity), since
+    whatever passes is copied into the manifest byte for byte.
+    """
+    try:
+        data = path.read_bytes().strip()
+        # A str parse rejects a BOM, which a bytes parse would skip over
+        json.loads(data.decode("utf-8"), parse_constant=_reject_constant)
+    except OSError as e:
+        sys.exit(f"ERROR: could not read schema file {path}: {e}")
+    except Exception as e:
+        sys.exit(f"ERROR: invalid JSON in schema file {path}: {e}")
+    return data
+
+
 def scaffold_mcp_server(
     dest_dir: Path,
     *,
@@ -201,18 +555,14 @@ def scaffold_mcp_server(
     """
     Create a minimal 'mcp_server' manifest with a best-effort mcp_registration.
     """
-    base = BaseManifest(
-        type="mcp_server",
-        id=id,
-        version=version,
-        name=name,
+    manifest = _manifest_base(
+        "mcp_server", id, version, name,
         summary=summary,
         description=description,
         license=license,
         homepage=homepage,
         publisher=publisher,
     )
-    manifest: Dict[str, Any] = asdict(base)
     # Normalize transport for GW: "SSE" | "REST" | "MCP"
     transport_up = transport.strip().upper()
     manifest["mcp_registration"] = {
@@ -239,42 +589,57 @@ def scaffold_tool(
     description: Optional[str] = None,
     input_schema_json: Optional[str] = None,
     output_schema_json: Optional[str] = None,
+    input_schema_file: Optional[Path] = None,
+    output_schema_file: Optional[Path] = None,
     license: Optional[str] = None,
     homepage: Optional[str] = None,
     publisher: Optional[str] = None,
 ) -> Path:
     """
     Create a minimal 'tool' manifest (Matrix-Hub requires type, id, version, name).
+    A schema given as a file is copied into the manifest verbatim instead of
+    being decoded and re-encoded; it takes precedence over the *_json text.
     """
-    base = BaseManifest(
-        type="tool",
-        id=id,
-        version=version,
-        name=name,
+    manifest = _manifest_base(
+        "tool", id, version, name,
         summary=summary,
         description=description,
         license=license,
         homepage=homepage,
         publisher=publisher,
     )
-    manifest: Dict[str, Any] = asdict(base)
     # Optional schemas
     def _parse(json_text: Optional[str]) -> Any:
         if not json_text:
             return None
         try:
-            return json.loads(json_text)
+            return loads_json(json_text)
         except Exception as e:
             sys.exit(f"ERROR: invalid JSON for schema: {e}")
 
-    input_schema = _parse(input_schema_json)
-    output_schema = _parse(output_schema_json)
-    if input_schema is not None:
-        manifest["input_schema"] = input_schema
-    if output_schema is not None:
-        manifest["output_schema"] = output_schema
+    raw: Dict[str, bytes] = {}
+    for key, json_text, json_file in (
+        ("input_schema", input_schema_json, input_schema_file),
+        ("output_schema", output_schema_json, output_schema_file),
+    ):
+        if json_file is not None:
+            manifest[key] = _RAW_PLACEHOLDER + key
+            raw[manifest[key]] = _read_raw_json(Path(json_file))
+            continue
+        schema = _parse(json_text)
+        if schema is not None:
+            manifest[key] = schema
     filename = f"{id}.manifest.json"
-    return write_manifest(dest_dir, filename, manifest)
+    return write_manifest(dest_dir, filename, manifest, raw=raw)
+
+
+# Above this many tool ids, scaffold_agent writes "tools" as a raw fragment
+_RAW_TOOLS_MIN = 32
+
+
+def split_ids(text: str) -> Tuple[str, ...]:
+    """Parse a comma-separated id list, dropping blanks."""
+    return tuple(filter(None, map(str.strip, text.split(","))))
 
 
 def scaffold_agent(
@@ -284,7 +649,7 @@ def scaffold_agent(
     name: str,
     version: str,
     server_id: str,
-    tool_ids: List[str],
+    tool_ids: Sequence[str],
     summary: Optional[str] = None,
     description: Optional[str] = None,
     license: Optional[str] = None,
@@ -295,22 +660,31 @@ def scaffold_agent(
     Create a minimal 'agent' manifest that references a server and a list of tool ids.
     Exact schema can evolve; this sticks to conservative, self-descriptive fields.
     """
-    base = BaseManifest(
-        type="agent",
-        id=id,
-        version=version,
-        name=name,
+    manifest = _manifest_base(
+        "agent", id, version, name,
         summary=summary,
         description=description,
         license=license,
         homepage=homepage,
         publisher=publisher,
     )
-    manifest: Dict[str, Any] = asdict(base)
     manifest["server"] = {"id": server_id}
-    manifest["tools"] = [{"id": tid} for tid in tool_ids]
+    raw: Dict[str, bytes] = {}
+    if len(tool_ids) > _RAW_TOOLS_MIN:
+        # Many tools: emit the array as one prebuilt fragment, not a list of dicts
+        # (laid out as write_json would, "tools" being a top-level key)
+        manifest["tools"] = _RAW_PLACEHOLDER + "tools"
+        ids = map(dumps_json, tool_ids)
+        if _PRETTY:
+            raw[manifest["tools"]] = (
+                b'[\n    {\n      "id": ' + b'\n    },\n    {\n      "id": '.join(ids) + b"\n    }\n  ]"
+            )
+        else:
+            raw[manifest["tools"]] = b'[{"id":' + b'},{"id":'.join(ids) + b"}]"
+    else:
+        manifest["tools"] = [{"id": tid} for tid in tool_ids]
     filename = f"{id}.manifest.json"
-    return write_manifest(dest_dir, filename, manifest)
+    return write_manifest(dest_dir, filename, manifest, raw=raw)
 
 
 # -------------------- Commands --------------------
@@ -322,13 +696,51 @@ def cmd_init_empty(a: argparse.Namespace) -> None:
 
 
 def cmd_add_url(a: argparse.Namespace) -> None:
+    url = a.manifest_url
+    if not _IN_SESSION and (
+        append_entry_streaming(a.out, "items", {"manifest_url": url}, url)
+        or append_entry_streaming(a.out, "manifests", url, url)
+    ):
+        print("✅ Added URL → " + url)
+        return
     idx = ensure_index(a.out)
     changed = add_manifest_url(idx, a.manifest_url)
     persist_index(a.out, idx)
     print(("✅ Added URL → " if changed else "ℹ️  URL already present → ") + a.manifest_url)
 
 
+def cmd_add_urls(a: argparse.Namespace) -> None:
+    """Add every manifest URL listed one per line in a file or stdin, writing the index once."""
+    if a.stdin and _IN_SESSION:
+        sys.exit("ERROR: add-urls --stdin can't be used in a session (stdin holds its commands)")
+    src = "stdin" if a.stdin else a.file
+    try:
+        data = sys.stdin.buffer.read() if a.stdin else a.file.read_bytes()
+    except OSError as e:
+        sys.exit(f"ERROR: Could not read {src}: {e}")
+    urls = []
+    for lineno, line in enumerate(data.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith(b"#"):
+            continue
+        try:
+            urls.append(line.decode())
+        except UnicodeDecodeError as e:
+            sys.exit(f"ERROR: {src}:{lineno}: not valid UTF-8: {e}")
+    idx = ensure_index(a.out)
+    new = add_manifest_urls(idx, urls)
+    persist_index(a.out, idx)
+    print(f"✅ Added {len(new)} URL(s) ({len(urls) - len(new)} already present) → {a.out}")
+
+
 def cmd_add_entry(a: argparse.Namespace) -> None:
+    # Any entry resolving to the same URL ends in the same last path segment
+    name = a.path.rsplit("/", 1)[-1]
+    if not _IN_SESSION and append_entry_streaming(
+        a.out, "entries", {"path": a.path, "base_url": a.base_url}, name
+    ):
+        print(f"✅ Added entry → path={a.path}, base_url={a.base_url}")
+        return
     idx = ensure_index(a.out, shape="entries")
     changed = add_entry(idx, a.path, a.base_url)
     persist_index(a.out, idx)
@@ -336,6 +748,17 @@ def cmd_add_entry(a: argparse.Namespace) -> None:
     print(("✅ Added entry → " if changed else "ℹ️  Entry already present → ") + msg)
 
 
+def _files_equal(a: Path, b: Path, bufsize: int = 65536) -> bool:
+    """Byte-compare two files: sizes first, then block by block."""
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    with a.open("rb") as fa, b.open("rb") as fb:
+        for block in iter(lambda: fa.read(bufsize), b""):
+            if block != fb.read(bufsize):
+                return False
+    return True
+
+
 def cmd_add_inline(a: argparse.Namespace) -> None:
     """
     Copy local manifest into ./matrix next to index.json and add a Form-C entry.
@@ -353,10 +776,11 @@ def cmd_add_inline(a: argparse.Namespace) -> None:
     dest = idx_dir / dest_name
     if dest.exists() and not a.force:
         # If same content, it's fine; else stop
-        if dest.read_text(encoding="utf-8") != src.read_text(encoding="utf-8"):
+        if not _files_equal(dest, src):
             sys.exit(f"ERROR: {dest} already exists and differs; use --force to overwrite or choose --filename.")
     else:
-        shutil.copyfile(src, dest)
+        # Through a temp file like every other write, so a crash can't leave a truncated copy
+        replace_file(dest, src.read_bytes())
 
     changed = add_entry(idx, path=dest.name, base_url=a.base_url)
     persist_index(out_index, idx)
@@ -397,6 +821,8 @@ def cmd_scaffold_tool(a: argparse.Namespace) -> None:
         description=a.description,
         input_schema_json=a.input_json,
         output_schema_json=a.output_json,
+        input_schema_file=a.input_schema_file,
+        output_schema_file=a.output_schema_file,
         license=a.license,
         homepage=a.homepage,
         publisher=a.publisher,
@@ -409,7 +835,7 @@ def cmd_scaffold_tool(a: argparse.Namespace) -> None:
 def cmd_scaffold_agent(a: argparse.Namespace) -> None:
     idx = ensure_index(a.out, shape="entries")
     idx_dir = a.out.parent
-    tool_ids = [s.strip() for s in a.tool_ids.split(",") if s.strip()]
+    tool_ids = split_ids(a.tool_ids)
     path = scaffold_agent(
         idx_dir,
         id=a.id,
@@ -428,90 +854,374 @@ def cmd_scaffold_agent(a: argparse.Namespace) -> None:
     print(f"✅ Wrote {path} and {'added' if changed else 'found existing'} entries record (base_url={a.base_url})")
 
 
-# -------------------- CLI --------------------
+def _op_add_url(idx: dict, idx_dir: Path, args: dict) -> tuple:
+    url = args["manifest_url"]
+    return add_manifest_url(idx, url), url
+
+
+def _op_add_entry(idx: dict, idx_dir: Path, args: dict) -> tuple:
+    changed = add_entry(idx, args["path"], args["base_url"])
+    return changed, f"path={args['path']}, base_url={args['base_url']}"
+
+
+# scaffold-tool's CLI option names -> scaffold_tool() keyword names (both are accepted)
+_SCAFFOLD_KWARGS = {"input_json": "input_schema_json", "output_json": "output_schema_json"}
+
+
+def _op_scaffold(scaffold):
+    def op(idx: dict, idx_dir: Path, args: dict) -> tuple:
+        kwargs = {_SCAFFOLD_KWARGS.get(k, k): v for k, v in args.items()}
+        base_url = kwargs.pop("base_url")
+        if isinstance(kwargs.get("tool_ids"), str):
+            kwargs["tool_ids"] = split_ids(kwargs["tool_ids"])
+        for key in ("input_schema_file", "output_schema_file"):
+            if kwargs.get(key) is not None:
+                kwargs[key] = Path(kwargs[key])
+        path = scaffold(idx_dir, **kwargs)
+        return add_entry(idx, path=path.name, base_url=base_url), f"{path} (base_url={base_url})"
+    return op
+
+
+# Operations accepted by `bulk`; args use the CLI option names with underscores
+# (e.g. manifest_url, base_url, input_json, input_schema_file, tool_ids).
+BULK_OPS = {
+    "add-url": _op_add_url,
+    "add-entry": _op_add_entry,
+    "scaffold-server": _op_scaffold(scaffold_mcp_server),
+    "scaffold-tool": _op_scaffold(scaffold_tool),
+    "scaffold-agent": _op_scaffold(scaffold_agent),
+}
+
+_SCAFFOLD_REQUIRED = ("base_url", "id", "name", "version")
+_SCAFFOLD_OPTIONAL = ("summary", "description", "license", "homepage", "publisher")
+_SCHEMA_JSON_ARGS = ("input_json", "output_json", "input_schema_json", "output_schema_json")
+
+# op -> (required args, optional args). Every value is a string (optional ones
+# may be null), except that tool_ids may also be a list of strings.
+BULK_ARGS = {
+    "add-url": (("manifest_url",), ()),
+    "add-entry": (("path", "base_url"), ()),
+    "scaffold-server": (_SCAFFOLD_REQUIRED + ("transport", "url"), _SCAFFOLD_OPTIONAL),
+    "scaffold-tool": (
+        _SCAFFOLD_REQUIRED,
+        _SCAFFOLD_OPTIONAL + _SCHEMA_JSON_ARGS + ("input_schema_file", "output_schema_file"),
+    ),
+    "scaffold-agent": (_SCAFFOLD_REQUIRED + ("server_id", "tool_ids"), _SCAFFOLD_OPTIONAL),
+}
+
+
+def _bulk_args_error(op: str, args: dict) -> Optional[str]:
+    """Why `args` can't be applied as `op`, or None; checked before anything is written."""
+    required, optional = BULK_ARGS[op]
+    missing = [k for k in required if args.get(k) is None]
+    if missing:
+        return "missing " + ", ".join(missing)
+    unknown = [k for k in args if k not in required and k not in optional]
+    if unknown:
+        return "unknown " + ", ".join(unknown)
+    for key, value in args.items():
+        if value is None or isinstance(value, str):
+            continue
+        if key == "tool_ids":
+            if isinstance(value, list) and all(isinstance(v, str) for v in value):
+                continue
+            return "tool_ids must be a string or a list of strings"
+        return f"{key} must be a string"
+    for cli_name, kwarg in _SCAFFOLD_KWARGS.items():
+        if args.get(cli_name) is not None and args.get(kwarg) is not None:
+            return f"give either {cli_name} or {kwarg}, not both"
+    for key in _SCHEMA_JSON_ARGS:
+        if args.get(key):
+            try:
+                loads_json(args[key])
+            except ValueError as e:
+                return f"invalid JSON in {key}: {e}"
+    return None
+
+
+def cmd_bulk(a: argparse.Namespace) -> None:
+    """
+    Apply every {"op", "args"} record in a JSONL file to the index in memory,
+    then write index.json once instead of once per operation. All records are
+    checked first, so a bad one stops the run before any file is written.
+    """
+    try:
+        data = a.ops.read_bytes()
+    except OSError as e:
+        sys.exit(f"ERROR: Could not read {a.ops}: {e}")
+    ops = []
+    for lineno, line in enumerate(data.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            rec = loads_json(line)
+        except Exception as e:
+            sys.exit(f"ERROR: {a.ops}:{lineno}: invalid JSON: {e}")
+        if not isinstance(rec, dict) or rec.get("op") not in BULK_OPS:
+            sys.exit(f"ERROR: {a.ops}:{lineno}: op must be one of {tuple(BULK_OPS)}")
+        args = rec.get("args") or {}
+        if not isinstance(args, dict):
+            sys.exit(f"ERROR: {a.ops}:{lineno}: args must be an object")
+        error = _bulk_args_error(rec["op"], args)
+        if error:
+            sys.exit(f"ERROR: {a.ops}:{lineno}: bad args for {rec['op']}: {error}")
+        ops.append((lineno, rec["op"], args))
+
+    global _NOW
+    # Inside a session, keep the timestamp it pinned until the next flush
+    prev_now = _NOW
+    _NOW = prev_now or _utc_now()
+    try:
+        # A new index takes the shape the first operation needs
+        shape = a.shape or ("items" if ops and ops[0][1] == "add-url" else "entries")
+        idx = ensure_index(a.out, shape=shape, write=False)
+        if "entries" not in idx and any(op != "add-url" for _, op, _ in ops):
+            idx["entries"] = []
+        idx_dir = a.out.parent
+        added = 0
+        for lineno, op, args in ops:
+            try:
+                changed, msg = BULK_OPS[op](idx, idx_dir, args)
+            except (KeyError, TypeError) as e:
+                sys.exit(f"ERROR: {a.ops}:{lineno}: bad args for {op}: {e}")
+            added += changed
+            print(("✅ " if changed else "ℹ️  already present ") + f"{op} → {msg}")
+
+        persist_index(a.out, idx)
+    finally:
+        _NOW = prev_now
+    print(f"✅ Applied {len(ops)} operations ({added} new) to {a.out}")
+
+
+def _session_argv(rec: dict, out: Path) -> List[str]:
+    """Turn {"cmd": ..., "some_option": value, ...} into a subcommand argv."""
+    argv = [rec["cmd"]]
+    if "out" not in rec:
+        argv += ["--out", str(out)]
+    for key, value in rec.items():
+        if key == "cmd" or value is None or value is False:
+            continue
+        if key == "ops":  # bulk's positional argument
+            argv.append(str(value))
+            continue
+        argv.append("--" + key.replace("_", "-"))
+        if value is not True:
+            argv.append(",".join(value) if isinstance(value, list) else str(value))
+    return argv
+
+
+def cmd_session(a: argparse.Namespace) -> None:
+    """
+    Read one JSON command per line from stdin and run it against indexes kept
+    in memory, so N commands cost one parse and one write of index.json.
+    A bad command is reported and skipped; {"cmd": "flush"} (or a bare
+    'flush' line) writes pending changes, as does EOF. Changes between two
+    flushes share one timestamp.
+    """
+    global _IN_SESSION, _NOW
+    ap = build_parser()
+    _IN_SESSION = True
+    _NOW = _utc_now()
+    try:
+        # Raw bytes straight to the JSON parser, no text decoding layer
+        for lineno, line in enumerate(sys.stdin.buffer, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = {"cmd": "flush"} if line == b"flush" else loads_json(line)
+                if not isinstance(rec, dict) or "cmd" not in rec:
+                    raise ValueError('expected an object with a "cmd" key')
+            except ValueError as e:
+                print(f"ERROR: stdin:{lineno}: {e}", file=sys.stderr)
+                continue
+            if rec["cmd"] == "flush":
+                print(f"✅ Flushed {flush_indexes()} index file(s)")
+                _NOW = _utc_now()
+                continue
+            if rec["cmd"] == "session":
+                print(f"ERROR: stdin:{lineno}: session cannot be nested", file=sys.stderr)
+                continue
+            try:
+                args = ap.parse_args(_session_argv(rec, a.out))
+                args.func(args)
+            except SystemExit as e:
+                # argparse errors and the commands' sys.exit("ERROR: ...") calls
+                if e.code not in (None, 0):
+                    print(e.code if isinstance(e.code, str) else f"ERROR: stdin:{lineno}: invalid command",
+                          file=sys.stderr)
+            except (OSError, ValueError) as e:
+                # e.g. a missing input file or bad JSON passed through an option
+                print(f"ERROR: stdin:{lineno}: {e}", file=sys.stderr)
+    finally:
+        _IN_SESSION = False
+        written = flush_indexes()
+        _NOW = None
+    print(f"✅ Session closed; wrote {written} index file(s)")
 
-def main() -> None:
-    ap = argparse.ArgumentParser(description="Init and maintain matrix/index.json (Matrix-Hub compatible)")
-    sub = ap.add_subparsers(dest="cmd", required=True)
 
+# -------------------- CLI --------------------
+
+def _add_init_empty_parser(sub) -> None:
     # init-empty
-    p0 = sub.add_parser("init-empty", help="Create an empty index in a supported shape.")
-    p0.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH, help="Output path (default: matrix/index.json)")
-    p0.add_argument("--shape", choices=VALID_SHAPES, default="items",
-                    help="Index shape: manifests | items | entries (default: items)")
-    p0.set_defaults(func=cmd_init_empty)
+    p = sub.add_parser("init-empty", help="Create an empty index in a supported shape.")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH, help="Output path (default: matrix/index.json)")
+    p.add_argument("--shape", choices=VALID_SHAPES, default="items",
+                   help="Index shape: manifests | items | entries (default: items)")
+    p.set_defaults(func=cmd_init_empty)
 
+
+def _add_add_url_parser(sub) -> None:
     # add-url (Form B or A)
-    p1 = sub.add_parser("add-url", help="Append one manifest URL (Form B 'items' or Form A 'manifests').")
-    p1.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p1.add_argument("--manifest-url", required=True)
-    p1.set_defaults(func=cmd_add_url)
+    p = sub.add_parser("add-url", help="Append one manifest URL (Form B 'items' or Form A 'manifests').")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+    p.add_argument("--manifest-url", required=True)
+    p.set_defaults(func=cmd_add_url)
+
+
+def _add_add_urls_parser(sub) -> None:
+    # add-urls (many Form B/A URLs, one index write)
+    p = sub.add_parser("add-urls", help="Append manifest URLs listed one per line, writing the index once.")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--file", type=Path, help="Text file with one URL per line (blank and '#' lines skipped)")
+    src.add_argument("--stdin", action="store_true", help="Read the URLs from stdin instead")
+    p.set_defaults(func=cmd_add_urls)
+
 
+def _add_add_entry_parser(sub) -> None:
     # add-entry (Form C)
-    p2 = sub.add_parser("add-entry", help="Append one (path, base_url) pair (Form C 'entries').")
-    p2.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p2.add_argument("--path", required=True, help="Relative path to manifest file stored alongside index.json")
-    p2.add_argument("--base-url", required=True, help="Absolute base URL that serves the index folder")
-    p2.set_defaults(func=cmd_add_entry)
+    p = sub.add_parser("add-entry", help="Append one (path, base_url) pair (Form C 'entries').")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+    p.add_argument("--path", required=True, help="Relative path to manifest file stored alongside index.json")
+    p.add_argument("--base-url", required=True, help="Absolute base URL that serves the index folder")
+    p.set_defaults(func=cmd_add_entry)
 
-    # add-inline (copy + add-entry)
-    p3 = sub.add_parser("add-inline", help="Copy local manifest into ./matrix and add as an 'entries' record.")
-    p3.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p3.add_argument("--manifest", required=True, help="Local path to YAML/JSON manifest to copy")
-    p3.add_argument("--base-url", required=True, help="Absolute base URL where the index folder is served")
-    p3.add_argument("--filename", default=None, help="Destination filename (defaults to source filename)")
-    p3.add_argument("--force", action="store_true", help="Overwrite destination if it exists")
-    p3.set_defaults(func=cmd_add_inline)
 
+def _add_add_inline_parser(sub) -> None:
+    # add-inline (copy + add-entry)
+    p = sub.add_parser("add-inline", help="Copy local manifest into ./matrix and add as an 'entries' record.")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+    p.add_argument("--manifest", required=True, help="Local path to YAML/JSON manifest to copy")
+    p.add_argument("--base-url", required=True, help="Absolute base URL where the index folder is served")
+    p.add_argument("--filename", default=None, help="Destination filename (defaults to source filename)")
+    p.add_argument("--force", action="store_true", help="Overwrite destination if it exists")
+    p.set_defaults(func=cmd_add_inline)
+
+
+_SCAFFOLD_COMMON: Optional[argparse.ArgumentParser] = None
+
+
+def _scaffold_common() -> argparse.ArgumentParser:
+    """Parent parser with the options all scaffold-* commands share (built once, on demand)."""
+    global _SCAFFOLD_COMMON
+    if _SCAFFOLD_COMMON is None:
+        c = _SCAFFOLD_COMMON = argparse.ArgumentParser(add_help=False)
+        c.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+        c.add_argument("--base-url", required=True, help="Absolute base URL where the ./matrix folder is served")
+        c.add_argument("--id", required=True)
+        c.add_argument("--name", required=True)
+        c.add_argument("--version", required=True)
+        c.add_argument("--summary", default=None)
+        c.add_argument("--description", default=None)
+        c.add_argument("--license", default=None)
+        c.add_argument("--homepage", default=None)
+        c.add_argument("--publisher", default=None)
+    return _SCAFFOLD_COMMON
+
+
+def _add_scaffold_server_parser(sub) -> None:
     # scaffold-server (mcp_server)
-    p4 = sub.add_parser("scaffold-server", help="Create a minimal 'mcp_server' manifest and add it to the index.")
-    p4.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p4.add_argument("--base-url", required=True, help="Absolute base URL where the ./matrix folder is served")
-    p4.add_argument("--id", required=True)
-    p4.add_argument("--name", required=True)
-    p4.add_argument("--version", required=True)
-    p4.add_argument("--transport", required=True, help="SSE | REST | MCP (case-insensitive)")
-    p4.add_argument("--url", required=True, help="Transport URL (e.g., http://127.0.0.1:8000/messages/ for SSE)")
-    p4.add_argument("--summary", default=None)
-    p4.add_argument("--description", default=None)
-    p4.add_argument("--license", default=None)
-    p4.add_argument("--homepage", default=None)
-    p4.add_argument("--publisher", default=None)
-    p4.set_defaults(func=cmd_scaffold_server)
+    p = sub.add_parser("scaffold-server", parents=[_scaffold_common()],
+                       help="Create a minimal 'mcp_server' manifest and add it to the index.")
+    p.add_argument("--transport", required=True, help="SSE | REST | MCP (case-insensitive)")
+    p.add_argument("--url", required=True, help="Transport URL (e.g., http://127.0.0.1:8000/messages/ for SSE)")
+    p.set_defaults(func=cmd_scaffold_server)
 
-    # scaffold-tool (tool)
-    p5 = sub.add_parser("scaffold-tool", help="Create a minimal 'tool' manifest and add it to the index.")
-    p5.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p5.add_argument("--base-url", required=True)
-    p5.add_argument("--id", required=True)
-    p5.add_argument("--name", required=True)
-    p5.add_argument("--version", required=True)
-    p5.add_argument("--summary", default=None)
-    p5.add_argument("--description", default=None)
-    p5.add_argument("--input-json", default=None, help="JSON for input_schema")
-    p5.add_argument("--output-json", default=None, help="JSON for output_schema")
-    p5.add_argument("--license", default=None)
-    p5.add_argument("--homepage", default=None)
-    p5.add_argument("--publisher", default=None)
-    p5.set_defaults(func=cmd_scaffold_tool)
 
+def _add_scaffold_tool_parser(sub) -> None:
+    # scaffold-tool (tool)
+    p = sub.add_parser("scaffold-tool", parents=[_scaffold_common()],
+                       help="Create a minimal 'tool' manifest and add it to the index.")
+    inp = p.add_mutually_exclusive_group()
+    inp.add_argument("--input-json", default=None, help="JSON for input_schema")
+    inp.add_argument("--input-schema-file", type=Path, default=None,
+                     help="File whose JSON is copied verbatim as input_schema")
+    outp = p.add_mutually_exclusive_group()
+    outp.add_argument("--output-json", default=None, help="JSON for output_schema")
+    outp.add_argument("--output-schema-file", type=Path, default=None,
+                      help="File whose JSON is copied verbatim as output_schema")
+    p.set_defaults(func=cmd_scaffold_tool)
+
+
+def _add_scaffold_agent_parser(sub) -> None:
     # scaffold-agent (agent)
-    p6 = sub.add_parser("scaffold-agent", help="Create a minimal 'agent' manifest that references a server/tools.")
-    p6.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
-    p6.add_argument("--base-url", required=True)
-    p6.add_argument("--id", required=True)
-    p6.add_argument("--name", required=True)
-    p6.add_argument("--version", required=True)
-    p6.add_argument("--server-id", required=True, help="Server id that this agent uses")
-    p6.add_argument("--tool-ids", required=True, help="Comma-separated tool ids")
-    p6.add_argument("--summary", default=None)
-    p6.add_argument("--description", default=None)
-    p6.add_argument("--license", default=None)
-    p6.add_argument("--homepage", default=None)
-    p6.add_argument("--publisher", default=None)
-    p6.set_defaults(func=cmd_scaffold_agent)
-
-    args = ap.parse_args()
+    p = sub.add_parser("scaffold-agent", parents=[_scaffold_common()],
+                       help="Create a minimal 'agent' manifest that references a server/tools.")
+    p.add_argument("--server-id", required=True, help="Server id that this agent uses")
+    p.add_argument("--tool-ids", required=True, help="Comma-separated tool ids")
+    p.set_defaults(func=cmd_scaffold_agent)
+
+
+def _add_bulk_parser(sub) -> None:
+    # bulk (many operations, one index write)
+    p = sub.add_parser("bulk", help="Apply add/scaffold operations from a JSONL file, writing the index once.")
+    p.add_argument("ops", type=Path, help='JSONL file of {"op": ..., "args": {...}} records')
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH)
+    p.add_argument("--shape", choices=VALID_SHAPES, default=None,
+                   help="Shape for a new index (default: from the first operation)")
+    p.set_defaults(func=cmd_bulk)
+
+
+def _add_session_parser(sub) -> None:
+    # session (resident index, commands on stdin)
+    p = sub.add_parser("session", help="Keep the index in memory and run JSON commands read from stdin.")
+    p.add_argument("--out", type=Path, default=DEFAULT_INDEX_PATH,
+                   help="Index used by commands that don't set their own 'out'")
+    p.set_defaults(func=cmd_session)
+
+
+# Subcommand name -> function adding its parser; main() only builds the one it needs
+_SUBPARSERS = {
+    "init-empty": _add_init_empty_parser,
+    "add-url": _add_add_url_parser,
+    "add-urls": _add_add_urls_parser,
+    "add-entry": _add_add_entry_parser,
+    "add-inline": _add_add_inline_parser,
+    "scaffold-server": _add_scaffold_server_parser,
+    "scaffold-tool": _add_scaffold_tool_parser,
+    "scaffold-agent": _add_scaffold_agent_parser,
+    "bulk": _add_bulk_parser,
+    "session": _add_session_parser,
+}
+
+
+def build_parser(cmd: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    The CLI parser. With a known `cmd` only that subcommand's parser is built
+    (the common case when init.py runs once per operation); otherwise, e.g.
+    for top-level --help or a typo, all of them are, so help and errors list
+    every command.
+    """
+    ap = argparse.ArgumentParser(description="Init and maintain matrix/index.json (Matrix-Hub compatible)")
+    ap.add_argument("--pretty", action="store_true",
+                    help="Write indented JSON (default: compact); goes before the subcommand")
+    ap.add_argument("--durable", action="store_true",
+                    help="fsync every write before it replaces the old file (writes are always atomic)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    builders = {cmd: _SUBPARSERS[cmd]} if cmd in _SUBPARSERS else _SUBPARSERS
+    for add_parser in builders.values():
+        add_parser(sub)
+    return ap
+
+
+def main() -> None:
+    global _PRETTY, _DURABLE
+    # Global flags take no values, so the first bare word is the subcommand
+    cmd = next((arg for arg in sys.argv[1:] if not arg.startswith("-")), None)
+    args = build_parser(cmd).parse_args()
+    _PRETTY = args.pretty
+    _DURABLE = args.durable
     args.func(args)
 
 
@@ -16,11 +16,14 @@ Usage:
 Commands (proxied to scripts/init.py):
   init-empty           Initialize an empty index (default shape=items)
   add-url              Add one manifest URL to the index (Form B or A)
+  add-urls             Add manifest URLs from a file/stdin with one index write
   add-entry            Add one (path, base_url) pair to the index (Form C)
   add-inline           Copy a local manifest into ./matrix and add entry
   scaffold-server      Generate a minimal mcp_server manifest (+ add entry)
   scaffold-tool        Generate a minimal tool manifest (+ add entry)
   scaffold-agent       Generate a minimal agent manifest (+ add entry)
+  bulk                 Apply operations from a JSONL file with one index write
+  session              Run JSON commands from stdin against an in-memory index
 
 Helpers:
   serve [PORT]         Serve repo root via python -m http.server (default: 8001)
@@ -49,7 +52,7 @@ ensure_tools() {
 }
 
 case "${1:-}" in
-  init-empty|add-url|add-entry|add-inline|scaffold-server|scaffold-tool|scaffold-agent)
+  init-empty|add-url|add-urls|add-entry|add-inline|scaffold-server|scaffold-tool|scaffold-agent|bulk|session)
     ensure_tools
     exec "$PY" "$INIT_PY" "$@"
     ;;